@@ -0,0 +1,63 @@
+import hashlib
+from collections import defaultdict
+from pathlib import Path
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+#Хэш содержимого файла (читается блоками, чтобы не загружать большие файлы целиком)
+def file_digest(file_path, chunk_size=HASH_CHUNK_SIZE):
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+#Группировка файлов с одинаковым содержимым.
+#Возвращает список пар (хэш, [пути]); первый путь в группе обрабатывается, остальные считаются дубликатами.
+#Хэш считается только для файлов, размер которых совпадает с размером другого файла;
+#для остальных возвращается None, и хэш вычисляется при обработке файла.
+#Недоступные файлы (битые ссылки, нет прав, удалены после поиска) считаются уникальными,
+#чтобы ошибку записал обработчик этого файла, а не прерывалась вся пачка.
+def group_duplicates(file_paths):
+
+    sizes = {}
+    for path in file_paths:
+        try:
+            sizes[Path(path)] = Path(path).stat().st_size
+        except OSError:
+            sizes[Path(path)] = None
+
+    size_counts = defaultdict(int)
+    for size in sizes.values():
+        size_counts[size] += 1
+
+    groups = {}
+    for path, size in sizes.items():
+        key = ("unique", path)
+        if size is not None and size_counts[size] > 1:
+            try:
+                key = file_digest(path)
+            except OSError:
+                pass
+        groups.setdefault(key, []).append(path)
+
+    return [(key if isinstance(key, str) else None, paths) for key, paths in groups.items()]
+
+
+#Путь к JSON-результату, повторяющий относительный путь исходного файла.
+#Имя файла сохраняет расширение (report.pdf -> report.pdf.json), поэтому report.xls и report.xlsx не перезаписывают друг друга.
+def output_path_for(file_path, root_dir, output_dir, create_dirs=True):
+
+    file_path = Path(file_path)
+    try:
+        relative = file_path.relative_to(root_dir)
+    except ValueError:
+        relative = Path(file_path.name)
+
+    json_output = Path(output_dir) / relative.parent / f"{relative.name}.json"
+    if create_dirs:
+        json_output.parent.mkdir(parents=True, exist_ok=True)
+    return json_output
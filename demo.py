@@ -2,7 +2,10 @@ import streamlit as st
 import os
 import sys
 import json
+import time
+import heapq
 import tempfile
+import pandas as pd
 from pathlib import Path
 import importlib.util
 
@@ -18,6 +21,8 @@ def import_module_from_path(module_name, file_path):
 
 # Импорт функций из файлов
 current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+from batch_utils import group_duplicates
 
 # Импорт DOCX парсера
 docx_parser = import_module_from_path(
@@ -54,9 +59,12 @@ def main():
             process_docx = st.checkbox("Обрабатывать DOCX", value=True)
             process_excel = st.checkbox("Обрабатывать Excel", value=True)
             process_pdf = st.checkbox("Обрабатывать PDF", value=True)
+            exclude_table_text = st.checkbox("Не дублировать текст таблиц PDF в тексте страницы", value=False)
 
             if st.form_submit_button("Запустить обработку", type="primary"):
-                run_directory_processing(directory_path, process_docx, process_excel, process_pdf)
+                run_directory_processing(directory_path, process_docx, process_excel, process_pdf, exclude_table_text)
+
+        show_directory_results()
 
         st.info("""
         **Инструкция:**
@@ -87,7 +95,13 @@ def main():
         """)
 
 
-def run_directory_processing(directory_path, process_docx, process_excel, process_pdf):
+# Интервал обновления сводки во время обработки, с
+DASHBOARD_UPDATE_INTERVAL = 0.5
+# Число строк на странице таблицы результатов
+RESULTS_PAGE_SIZE = 100
+
+
+def run_directory_processing(directory_path, process_docx, process_excel, process_pdf, exclude_table_text=False):
     dir_path = Path(directory_path)
 
     if not dir_path.is_dir():
@@ -97,84 +111,183 @@ def run_directory_processing(directory_path, process_docx, process_excel, proces
     output_root = dir_path / "parsed_results"
     output_root.mkdir(parents=True, exist_ok=True)
 
+    # Поиск файлов; одинаковые по содержимому файлы обрабатываются один раз
+    tasks = []
+    file_types = [
+        ("DOCX", process_docx, ["**/*.docx"]),
+        ("Excel", process_excel, ["**/*.xlsx", "**/*.xls"]),
+        ("PDF", process_pdf, ["**/*.pdf"]),
+    ]
+    for file_type, enabled, patterns in file_types:
+        if not enabled:
+            continue
+        with st.spinner(f"Поиск {file_type} файлов..."):
+            files = [path for pattern in patterns for path in dir_path.glob(pattern)]
+        if files:
+            tasks.extend((file_type, paths, content_hash) for content_hash, paths in group_duplicates(files))
+        else:
+            st.info(f"{file_type} файлы не найдены")
+
+    if not tasks:
+        return
+
     progress_bar = st.progress(0)
     status_text = st.empty()
+    dashboard = st.empty()
+
+    records = []
+    totals = {}
+    started = time.monotonic()
+    last_update = 0
+
+    for i, (file_type, paths, content_hash) in enumerate(tasks):
+        file_started = time.perf_counter()
+        record = {
+            "Тип": file_type,
+            "Файл": str(paths[0].relative_to(dir_path)),
+            "Статус": "Успешно",
+            "Время, с": 0.0,
+            "Страниц": 0,
+            "Таблиц": 0,
+            "Строк": 0,
+            "Дубликатов": len(paths) - 1,
+            "Результат": "",
+            "Ошибка": ""
+        }
+        try:
+            json_output, statistics = process_directory_file(
+                file_type, paths, content_hash, dir_path, output_root, exclude_table_text
+            )
+            record.update(statistics_counts(file_type, statistics))
+            record["Результат"] = str(json_output)
+        except Exception as e:
+            record["Статус"] = "Ошибка"
+            record["Ошибка"] = str(e)
+        record["Время, с"] = round(time.perf_counter() - file_started, 3)
+
+        records.append(record)
+        update_totals(totals, record)
+
+        # Сводка перерисовывается не чаще DASHBOARD_UPDATE_INTERVAL
+        now = time.monotonic()
+        if now - last_update >= DASHBOARD_UPDATE_INTERVAL or i == len(tasks) - 1:
+            progress_bar.progress((i + 1) / len(tasks))
+            status_text.text(f"Обработано файлов: {i + 1} из {len(tasks)}")
+            with dashboard.container():
+                show_dashboard(records, totals, now - started)
+            last_update = now
+
+    progress_bar.empty()
+    status_text.empty()
+    dashboard.empty()
+
+    st.session_state["directory_results"] = {
+        "records": records,
+        "totals": totals,
+        "elapsed": time.monotonic() - started
+    }
+    st.success("Обработка завершена!")
+    st.balloons()
 
-    # Обработка DOCX
-    if process_docx:
-        output_dir = output_root / "Обработанные docx"
-        output_dir.mkdir(exist_ok=True)
-
-        with st.spinner("Поиск DOCX файлов..."):
-            docx_files = list(dir_path.glob("**/*.docx"))
-
-        if docx_files:
-            status_text.text(f"Найдено DOCX файлов: {len(docx_files)}")
-            for i, docx_path in enumerate(docx_files):
-                progress = (i + 1) / len(docx_files)
-                progress_bar.progress(progress)
-
-                with st.expander(f"Обработка: {docx_path.name}"):
-                    try:
-                        docx_parser.process_docx_file(docx_path, output_dir)
-                        st.success(f"Успешно обработан!")
-                        st.info(f"Результат: {output_dir / docx_path.stem}.json")
-                    except Exception as e:
-                        st.error(f"Ошибка обработки: {str(e)}")
-        else:
-            st.info("DOCX файлы не найдены")
 
-    # Обработка Excel
-    if process_excel:
+# Обработка одного файла из директории парсером нужного типа
+def process_directory_file(file_type, paths, content_hash, dir_path, output_root, exclude_table_text):
+    if file_type == "DOCX":
+        output_dir = output_root / "Обработанные docx"
+        return docx_parser.process_docx_file(
+            paths[0], output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash
+        )
+    if file_type == "Excel":
         output_dir = output_root / "Обработанные excel"
-        output_dir.mkdir(exist_ok=True)
-
-        with st.spinner("Поиск Excel файлов..."):
-            excel_files = list(dir_path.glob("**/*.xlsx")) + list(dir_path.glob("**/*.xls"))
-
-        if excel_files:
-            status_text.text(f"Найдено Excel файлов: {len(excel_files)}")
-            for i, excel_path in enumerate(excel_files):
-                progress = (i + 1) / len(excel_files)
-                progress_bar.progress(progress)
-
-                with st.expander(f"Обработка: {excel_path.name}"):
-                    try:
-                        excel_parser.process_excel_file(excel_path, output_dir)
-                        st.success("Успешно обработан!")
-                        st.info(f"Результат: {output_dir / excel_path.stem}.json")
-                    except Exception as e:
-                        st.error(f"Ошибка обработки: {str(e)}")
-        else:
-            st.info("Excel файлы не найдены")
-
-    # Обработка PDF
-    if process_pdf:
-        output_dir = output_root / "Обработанные pdf"
-        output_dir.mkdir(exist_ok=True)
-
-        with st.spinner("Поиск PDF файлов..."):
-            pdf_files = list(dir_path.glob("**/*.pdf"))
-
-        if pdf_files:
-            status_text.text(f"Найдено PDF файлов: {len(pdf_files)}")
-            for i, pdf_path in enumerate(pdf_files):
-                progress = (i + 1) / len(pdf_files)
-                progress_bar.progress(progress)
-
-                with st.expander(f"Обработка: {pdf_path.name}"):
-                    try:
-                        pdf_parser.process_pdf_file(pdf_path, output_dir)
-                        st.success("Успешно обработан!")
-                        st.info(f"Результат: {output_dir / pdf_path.stem}.json")
-                    except Exception as e:
-                        st.error(f"Ошибка обработки: {str(e)}")
-        else:
-            st.info("PDF файлы не найдены")
+        return excel_parser.process_excel_file(
+            paths[0], output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash
+        )
+    output_dir = output_root / "Обработанные pdf"
+    return pdf_parser.process_pdf(
+        paths[0], output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash,
+        exclude_table_text=exclude_table_text
+    )
+
+
+# Приведение статистики документа к общим показателям (для Excel таблицами считаются листы)
+def statistics_counts(file_type, statistics):
+    if file_type == "Excel":
+        return {"Таблиц": statistics["sheets"], "Строк": statistics["rows"]}
+    return {
+        "Страниц": statistics.get("pages", 0),
+        "Таблиц": statistics["tables"],
+        "Строк": statistics["table_rows"]
+    }
+
+
+# Накопление итогов по типам файлов
+def update_totals(totals, record):
+    total = totals.setdefault(record["Тип"], {
+        "Тип": record["Тип"],
+        "Файлов": 0,
+        "Дубликатов": 0,
+        "Ошибок": 0,
+        "Страниц": 0,
+        "Таблиц": 0,
+        "Строк": 0,
+        "Время, с": 0.0
+    })
+    total["Файлов"] += 1
+    total["Ошибок"] += record["Статус"] == "Ошибка"
+    for key in ("Дубликатов", "Страниц", "Таблиц", "Строк", "Время, с"):
+        total[key] += record[key]
+
+
+# Сводка: скорость обработки, доля ошибок, итоги по типам и самые медленные файлы
+def show_dashboard(records, totals, elapsed):
+    elapsed = max(elapsed, 1e-6)
+    files = len(records)
+    pages = sum(total["Страниц"] for total in totals.values())
+    rows = sum(total["Строк"] for total in totals.values())
+    errors = sum(total["Ошибок"] for total in totals.values())
+
+    columns = st.columns(5)
+    columns[0].metric("Файлов/с", f"{files / elapsed:.1f}")
+    columns[1].metric("Страниц/с", f"{pages / elapsed:.1f}")
+    columns[2].metric("Строк/с", f"{rows / elapsed:.1f}")
+    columns[3].metric("Доля ошибок", f"{errors / files:.1%}" if files else "0%")
+    columns[4].metric("Время, с", f"{elapsed:.1f}")
+
+    st.write("**Итоги по типам файлов**")
+    totals_df = pd.DataFrame(list(totals.values()))
+    totals_df["Время, с"] = totals_df["Время, с"].round(2)
+    st.dataframe(totals_df, hide_index=True, width="stretch")
+
+    st.write("**Самые медленные файлы**")
+    slowest = heapq.nlargest(10, records, key=lambda record: record["Время, с"])
+    st.dataframe(
+        pd.DataFrame(slowest, columns=["Тип", "Файл", "Статус", "Время, с", "Страниц", "Строк"]),
+        hide_index=True,
+        width="stretch"
+    )
+
+
+# Результаты последней пакетной обработки: сводка и постраничная таблица файлов
+def show_directory_results():
+    results = st.session_state.get("directory_results")
+    if not results or not results["records"]:
+        return
 
-    progress_bar.empty()
-    status_text.success("Обработка завершена!")
-    st.balloons()
+    st.subheader("Результаты обработки")
+    show_dashboard(results["records"], results["totals"], results["elapsed"])
+
+    records = results["records"]
+    if st.checkbox("Показывать только ошибки", key="results_errors_only"):
+        records = [record for record in records if record["Статус"] == "Ошибка"]
+
+    pages = max(1, (len(records) + RESULTS_PAGE_SIZE - 1) // RESULTS_PAGE_SIZE)
+    page = st.number_input(f"Страница (всего {pages})", min_value=1, max_value=pages, value=1, key="results_page")
+    start = (page - 1) * RESULTS_PAGE_SIZE
+    st.dataframe(
+        pd.DataFrame(records[start:start + RESULTS_PAGE_SIZE]),
+        hide_index=True,
+        width="stretch"
+    )
 
 
 def run_single_file_processing(uploaded_file, file_type):
@@ -199,10 +312,9 @@ def run_single_file_processing(uploaded_file, file_type):
                     output_dir.mkdir()
 
                     # Обрабатываем PDF
-                    pdf_parser.process_pdf_file(file_path, output_dir)
+                    result_path, _ = pdf_parser.process_pdf(file_path, output_dir)
 
                     # Читаем результат
-                    result_path = output_dir / (file_path.stem + ".json")
                     with open(result_path, "r", encoding="utf-8") as f:
                         result = json.load(f)
                     result_type = "PDF"
@@ -213,10 +325,9 @@ def run_single_file_processing(uploaded_file, file_type):
                     output_dir.mkdir()
 
                     # Обрабатываем Excel
-                    excel_parser.process_excel_file(file_path, output_dir)
+                    result_path, _ = excel_parser.process_excel_file(file_path, output_dir)
 
                     # Читаем результат
-                    result_path = output_dir / (file_path.stem + ".json")
                     with open(result_path, "r", encoding="utf-8") as f:
                         result = json.load(f)
                     result_type = "Excel"
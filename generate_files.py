@@ -1,5 +1,7 @@
 import os
 import random
+import argparse
+from multiprocessing import Pool
 from faker import Faker
 from docx import Document
 from openpyxl import Workbook
@@ -23,7 +25,7 @@ def generate_text(min_sentences=3, max_sentences=15):
         lambda: f"{fake.company()} Report\n\n{fake.paragraph(nb_sentences=3)}",
         lambda: f"Date: {fake.date_this_decade()}\n\nSubject: {fake.sentence()}\n\n{fake.paragraph(nb_sentences=4)}",
         lambda: f"{fake.word().capitalize()} Analysis\n\n{fake.paragraph(nb_sentences=5)}",
-        lambda: f"CONTACT:\nName: {fake.name()}\nEmail: {fake.email()}\nPhone: {fake.phone_number()}\nAddress: {fake.address().replace('\n', ', ')}"
+        lambda: f"CONTACT:\nName: {fake.name()}\nEmail: {fake.email()}\nPhone: {fake.phone_number()}\nAddress: {', '.join(fake.address().splitlines())}"
     ]
     return '\n\n'.join(random.choice(content_types)() for _ in range(num_sentences))
 
@@ -91,36 +93,106 @@ def generate_table(rows, cols):
         ]
 
 
-def generate_docx(pages, file_path):
+def build_pools(pool_size=200):
+    """Предварительная генерация наборов текстов и таблиц для повторного использования"""
+    return {
+        'texts': [generate_text(2, 5) for _ in range(pool_size)],
+        'phrases': [fake.catch_phrase() for _ in range(pool_size)],
+        'sentences': [fake.sentence() for _ in range(pool_size)],
+        'words': [fake.word().capitalize() for _ in range(pool_size)],
+        'tables': [generate_table(random.randint(4, 8), random.randint(3, 5)) for _ in range(pool_size)],
+    }
+
+
+def pick_text(pools, min_sentences, max_sentences):
+    """Текстовый блок из набора или новый, если наборы не заданы"""
+    return random.choice(pools['texts']) if pools else generate_text(min_sentences, max_sentences)
+
+
+def pick_phrase(pools):
+    """Заголовок из набора или новый, если наборы не заданы"""
+    return random.choice(pools['phrases']) if pools else fake.catch_phrase()
+
+
+def pick_sentences(pools, count):
+    """Пункты списка из набора или новые, если наборы не заданы"""
+    if pools:
+        return random.sample(pools['sentences'], count)
+    return [fake.sentence() for _ in range(count)]
+
+
+def pick_table(pools, rows, cols):
+    """Таблица из набора или новая, если наборы не заданы"""
+    return random.choice(pools['tables']) if pools else generate_table(rows, cols)
+
+
+def pick_rows(pools, rows, cols):
+    """Блок данных заданного размера, собранный из строк таблиц набора"""
+    block = []
+    for _ in range(rows):
+        row = random.choice(random.choice(pools['tables']))
+        block.append((list(row) * (cols // len(row) + 1))[:cols])
+    return block
+
+
+def generate_merged_table(rows, cols, pools):
+    """Широкая таблица с объединёнными ячейками: данные и список объединений (r0, c0, r1, c1)"""
+    words = pools['words'] if pools else [fake.word().capitalize() for _ in range(50)]
+    data = [[random.choice(words) for _ in range(cols)] for _ in range(rows)]
+    merges = []
+    for r in range(rows):
+        if r % 3 == 0:
+            # Горизонтальные объединения по 3 ячейки
+            merges.extend((r, c, r, c + 2) for c in range(1, cols - 2, 4))
+        elif r % 3 == 1 and r + 1 < rows:
+            # Вертикальное объединение в первом столбце
+            merges.append((r, 0, r + 1, 0))
+    return data, merges
+
+
+def generate_docx(pages, file_path, pools=None, tables_per_page=1, wide_merged=False):
     """Генерация DOCX файла"""
     doc = Document()
     for page_num in range(1, pages + 1):
         # Заголовок
-        doc.add_heading(f"{fake.catch_phrase()} - Page {page_num}", level=0)
+        doc.add_heading(f"{pick_phrase(pools)} - Page {page_num}", level=0)
 
         # Текстовый контент
         for _ in range(random.randint(2, 4)):
-            doc.add_paragraph(generate_text(2, 5))
+            doc.add_paragraph(pick_text(pools, 2, 5))
 
         # Подзаголовок
-        doc.add_heading(fake.catch_phrase(), level=2)
+        doc.add_heading(pick_phrase(pools), level=2)
 
         # Список
         list_type = random.choice(['bullet', 'number'])
-        list_items = [fake.sentence() for _ in range(random.randint(3, 6))]
+        list_items = pick_sentences(pools, random.randint(3, 6))
         for item in list_items:
             if list_type == 'bullet':
                 doc.add_paragraph(item, style='ListBullet')
             else:
                 doc.add_paragraph(item, style='ListNumber')
 
-        # Таблица
-        table = doc.add_table(rows=random.randint(4, 8), cols=random.randint(3, 5))
-        table.style = 'Table Grid'
-        table_data = generate_table(len(table.rows), len(table.columns))
-        for i, row in enumerate(table.rows):
-            for j, cell in enumerate(row.cells):
-                cell.text = str(table_data[i][j])
+        # Таблицы
+        for _ in range(tables_per_page):
+            table_data = pick_table(pools, random.randint(4, 8), random.randint(3, 5))
+            table = doc.add_table(rows=len(table_data), cols=len(table_data[0]))
+            table.style = 'Table Grid'
+            for row, values in zip(table.rows, table_data):
+                for cell, value in zip(row.cells, values):
+                    cell.text = str(value)
+
+        # Широкая таблица с объединёнными ячейками
+        if wide_merged:
+            table_data, merges = generate_merged_table(random.randint(10, 20), random.randint(20, 40), pools)
+            table = doc.add_table(rows=len(table_data), cols=len(table_data[0]))
+            table.style = 'Table Grid'
+            for row, values in zip(table.rows, table_data):
+                for cell, value in zip(row.cells, values):
+                    cell.text = value
+            for r0, c0, r1, c1 in merges:
+                merged = table.cell(r0, c0).merge(table.cell(r1, c1))
+                merged.text = table_data[r0][c0]
 
         # Разрыв страницы
         if page_num < pages:
@@ -129,7 +201,7 @@ def generate_docx(pages, file_path):
     doc.save(file_path)
 
 
-def generate_pdf(pages, file_path):
+def generate_pdf(pages, file_path, pools=None, tables_per_page=1, wide_merged=False):
     """Генерация PDF файла"""
     styles = getSampleStyleSheet()
     doc = SimpleDocTemplate(file_path, pagesize=A4)
@@ -137,21 +209,21 @@ def generate_pdf(pages, file_path):
 
     for page_num in range(1, pages + 1):
         # Заголовок
-        elements.append(Paragraph(f"{fake.catch_phrase()} - Page {page_num}", styles['Heading1']))
+        elements.append(Paragraph(f"{pick_phrase(pools)} - Page {page_num}", styles['Heading1']))
         elements.append(Spacer(1, 12))
 
         # Текстовый контент
         for _ in range(random.randint(2, 4)):
-            elements.append(Paragraph(generate_text(2, 4), styles['BodyText']))
+            elements.append(Paragraph(pick_text(pools, 2, 4), styles['BodyText']))
             elements.append(Spacer(1, 6))
 
         # Подзаголовок
-        elements.append(Paragraph(fake.catch_phrase(), styles['Heading2']))
+        elements.append(Paragraph(pick_phrase(pools), styles['Heading2']))
         elements.append(Spacer(1, 6))
 
         # Список
         list_type = random.choice(['bullet', 'number'])
-        list_items = [fake.sentence() for _ in range(random.randint(3, 5))]
+        list_items = pick_sentences(pools, random.randint(3, 5))
         for item in list_items:
             if list_type == 'bullet':
                 elements.append(Paragraph(f"• {item}", styles['BodyText']))
@@ -160,13 +232,26 @@ def generate_pdf(pages, file_path):
 
         elements.append(Spacer(1, 12))
 
-        # Таблица
-        table_data = generate_table(random.randint(4, 8), random.randint(3, 5))
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(table)
+        # Таблицы
+        for _ in range(tables_per_page):
+            table_data = pick_table(pools, random.randint(4, 8), random.randint(3, 5))
+            table = Table(table_data)
+            table.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            elements.append(table)
+            elements.append(Spacer(1, 12))
+
+        # Широкая таблица с объединёнными ячейками
+        if wide_merged:
+            table_data, merges = generate_merged_table(random.randint(10, 20), random.randint(12, 20), pools)
+            table = Table(table_data, colWidths=doc.width / len(table_data[0]))
+            table.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 4),
+                *[('SPAN', (c0, r0), (c1, r1)) for r0, c0, r1, c1 in merges]
+            ]))
+            elements.append(table)
 
         # Разрыв страницы
         if page_num < pages:
@@ -175,7 +260,7 @@ def generate_pdf(pages, file_path):
     doc.build(elements)
 
 
-def generate_xlsx(pages, file_path):
+def generate_xlsx(pages, file_path, pools=None, sheet_rows=None, sheet_cols=10, sparse=False, wide_merged=False):
     """Генерация XLSX файла"""
     wb = Workbook()
     wb.remove(wb.active)  # Удаляем дефолтный лист
@@ -184,21 +269,48 @@ def generate_xlsx(pages, file_path):
         ws = wb.create_sheet(title=f"Page_{page_num}")
 
         # Заголовок
-        ws['A1'] = f"{fake.company()} - Report"
-
-        # Таблицы
-        for table_num in range(1, random.randint(2, 3)):
-            start_row = (table_num - 1) * 15 + 3
-            table_data = generate_table(random.randint(5, 10), random.randint(4, 6))
+        ws['A1'] = f"{random.choice(pools['words']) if pools else fake.company()} - Report"
 
-            # Запись данных таблицы
+        if sheet_rows:
+            # Блок данных заданного размера
+            start_row = 3
+            table_data = pick_rows(pools or build_pools(20), sheet_rows, sheet_cols)
             for i, row in enumerate(table_data):
                 for j, value in enumerate(row):
                     ws.cell(row=start_row + i, column=j + 1, value=value)
+        else:
+            # Таблицы
+            for table_num in range(1, random.randint(2, 3)):
+                start_row = (table_num - 1) * 15 + 3
+                table_data = pick_table(pools, random.randint(5, 10), random.randint(4, 6))
+
+                # Запись данных таблицы
+                for i, row in enumerate(table_data):
+                    for j, value in enumerate(row):
+                        ws.cell(row=start_row + i, column=j + 1, value=value)
 
         # Текстовый блок
         ws.cell(row=start_row + len(table_data) + 2, column=1, value="Summary")
-        ws.cell(row=start_row + len(table_data) + 3, column=1, value=generate_text(2, 3))
+        ws.cell(row=start_row + len(table_data) + 3, column=1, value=pick_text(pools, 2, 3))
+
+        # Широкий блок с объединёнными ячейками
+        if wide_merged:
+            merged_start = start_row + len(table_data) + 5
+            table_data, merges = generate_merged_table(random.randint(10, 20), random.randint(20, 40), pools)
+            for i, row in enumerate(table_data):
+                for j, value in enumerate(row):
+                    ws.cell(row=merged_start + i, column=j + 1, value=value)
+            for r0, c0, r1, c1 in merges:
+                ws.merge_cells(start_row=merged_start + r0, start_column=c0 + 1,
+                               end_row=merged_start + r1, end_column=c1 + 1)
+
+    # Огромный разреженный лист: несколько значений в дальних углах
+    if sparse:
+        ws = wb.create_sheet(title="Sparse")
+        ws['A1'] = "Sparse"
+        for _ in range(random.randint(5, 20)):
+            ws.cell(row=random.randint(1, 1048576), column=random.randint(1, 16384),
+                    value=pick_phrase(pools))
 
     wb.save(file_path)
 
@@ -230,5 +342,96 @@ def generate_all_files():
             counters['xlsx'] += 1
 
 
+# Пул процессов: наборы фрагментов строятся один раз при запуске каждого процесса
+_worker_pools = None
+
+
+def _init_worker(seed, pool_size):
+    global _worker_pools
+    random.seed(seed)
+    Faker.seed(seed)
+    _worker_pools = build_pools(pool_size)
+
+
+def _generate_task(task):
+    kind, file_path, pages, task_seed, options, sparse, merged = task
+    random.seed(task_seed)
+
+    if kind == 'docx':
+        generate_docx(pages, file_path, _worker_pools, options['tables_per_page'], wide_merged=merged)
+    elif kind == 'pdf':
+        generate_pdf(pages, file_path, _worker_pools, options['tables_per_page'], wide_merged=merged)
+    else:
+        generate_xlsx(pages, file_path, _worker_pools, options['sheet_rows'], options['sheet_cols'],
+                      sparse=sparse, wide_merged=merged)
+    return file_path
+
+
+def generate_corpus(output_dir="stress_files", counts=None, size_distribution=None, seed=0, workers=None,
+                    pool_size=200, tables_per_page=1, sheet_rows=None, sheet_cols=10, sparse_ratio=0.0, merged_ratio=0.0):
+    """Многопроцессная генерация большого воспроизводимого набора файлов для нагрузочного тестирования.
+
+    counts - количество файлов каждого типа, например {'docx': 10000, 'pdf': 10000, 'xlsx': 10000};
+    size_distribution - список пар (число страниц/листов, вес), например [(1, 70), (20, 25), (1000, 5)];
+    sparse_ratio - доля XLSX-файлов с огромным разреженным листом;
+    merged_ratio - доля файлов с широкими таблицами с объединёнными ячейками.
+    Оба случая выбираются для каждого файла независимо.
+    При одинаковом seed результат не зависит от числа процессов.
+    """
+    counts = counts or {'docx': 100, 'pdf': 100, 'xlsx': 100}
+    size_distribution = size_distribution or [(1, 1), (5, 1), (20, 1)]
+    options = {'tables_per_page': tables_per_page, 'sheet_rows': sheet_rows, 'sheet_cols': sheet_cols}
+    os.makedirs(output_dir, exist_ok=True)
+
+    rng = random.Random(seed)
+    sizes, weights = zip(*size_distribution)
+    tasks = []
+    for kind, count in counts.items():
+        for index in range(1, count + 1):
+            pages = rng.choices(sizes, weights)[0]
+            sparse = rng.random() < sparse_ratio
+            merged = rng.random() < merged_ratio
+            file_path = os.path.join(output_dir, f"{kind}_{index}.{kind}")
+            tasks.append((kind, file_path, pages, rng.getrandbits(64), options, sparse, merged))
+
+    # Крупные файлы запускаются первыми, чтобы не задерживать окончание генерации
+    tasks.sort(key=lambda task: task[2], reverse=True)
+
+    with Pool(workers, initializer=_init_worker, initargs=(seed, pool_size)) as pool:
+        for done, _ in enumerate(pool.imap_unordered(_generate_task, tasks, chunksize=4), 1):
+            if done % 100 == 0 or done == len(tasks):
+                print(f"Сгенерировано файлов: {done}/{len(tasks)}")
+
+
 if __name__ == "__main__":
-    generate_all_files()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Генерация тестовых файлов")
+    parser.add_argument("--corpus", action="store_true", help="Генерация большого набора для нагрузочного тестирования")
+    parser.add_argument("--output", default="stress_files")
+    parser.add_argument("--docx", type=int, default=100)
+    parser.add_argument("--pdf", type=int, default=100)
+    parser.add_argument("--xlsx", type=int, default=100)
+    parser.add_argument("--sizes", default="1:1,5:1,20:1", help="Страниц:вес через запятую, например 1:70,20:25,1000:5")
+    parser.add_argument("--tables-per-page", type=int, default=1)
+    parser.add_argument("--sheet-rows", type=int, default=None)
+    parser.add_argument("--sheet-cols", type=int, default=10)
+    parser.add_argument("--sparse-ratio", type=float, default=0.0, help="Доля XLSX-файлов с огромным разреженным листом")
+    parser.add_argument("--merged-ratio", type=float, default=0.0, help="Доля файлов с широкими объединёнными таблицами")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.corpus:
+        generate_corpus(
+            output_dir=args.output,
+            counts={'docx': args.docx, 'pdf': args.pdf, 'xlsx': args.xlsx},
+            size_distribution=[tuple(int(v) for v in item.split(":")) for item in args.sizes.split(",")],
+            seed=args.seed,
+            workers=args.workers,
+            tables_per_page=args.tables_per_page,
+            sheet_rows=args.sheet_rows,
+            sheet_cols=args.sheet_cols,
+            sparse_ratio=args.sparse_ratio,
+            merged_ratio=args.merged_ratio,
+        )
+    else:
+        generate_all_files()
\ No newline at end of file
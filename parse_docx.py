@@ -5,8 +5,9 @@ import docx
 from docx.document import Document as _Document
 from docx.oxml.table import CT_Tbl
 from docx.oxml.text.paragraph import CT_P
-from docx.table import Table
+from docx.table import Table, _Cell
 from docx.text.paragraph import Paragraph
+from batch_utils import file_digest, group_duplicates, output_path_for
 
 #Генератор, который последовательно возвращает все блоки (параграфы и таблицы) в документе или ячейке таблицы в порядке их появления.
 def iter_block_items(parent):
@@ -23,7 +24,7 @@ def iter_block_items(parent):
             yield Table(child, parent)
 
 #Поиск файло формата docx в директории
-def parse_directory_docs(directory_path):
+def parse_directory_docs(directory_path, dense_tables=False):
   
     dir_path = Path(directory_path)
 
@@ -44,29 +45,42 @@ def parse_directory_docs(directory_path):
 
     print(f"Найдено файлов: {len(docx_files)}")
 
-    for docx_path in docx_files:
+    # Одинаковые по содержимому файлы обрабатываются один раз
+    groups = group_duplicates(docx_files)
+    print(f"Уникальных файлов: {len(groups)}")
+
+    for content_hash, paths in groups:
+        docx_path = paths[0]
         try:
             print(f"\nОбработка файла: {docx_path.name}")
-            process_docx_file(docx_path, output_dir)
+            process_docx_file(docx_path, output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash,
+                              dense_tables=dense_tables)
         except Exception as e:
             print(f"Ошибка при обработке {docx_path.name}: {str(e)}")
 
     print("\nОбработка всех файлов завершена!")
 
 #Обработка одного файла
-def process_docx_file(docx_path, output_dir):
+def process_docx_file(docx_path, output_dir, root_dir=None, duplicates=(), content_hash=None, dense_tables=False):
    
-    base_name = docx_path.stem
-    document_structure = extract_document_structure(docx_path)
+    document_structure = extract_document_structure(docx_path, dense_tables)
+    document_structure["duplicate_files"] = [str(path) for path in duplicates]
+    document_structure["content_hash"] = content_hash or file_digest(docx_path)
 
-    json_output = output_dir / f"{base_name}.json"
+    json_output = output_path_for(docx_path, root_dir or docx_path.parent, output_dir)
     with open(json_output, "w", encoding="utf-8") as json_file:
         json.dump(document_structure, json_file, ensure_ascii=False, indent=2)
 
+    if duplicates:
+        print(f"Дубликатов: {len(duplicates)}")
     print(f"Результаты сохранены в: {json_output}")
 
-Извлечение структуры документа
-def extract_document_structure(docx_path):
+    return json_output, document_structure["statistics"]
+
+#Извлечение структуры документа.
+#Таблицы сохраняются в компактном виде (каждая ячейка один раз, с размерами объединения);
+#dense_tables=True сохраняет прежнюю полную сетку, где объединённая ячейка повторяется в каждой позиции
+def extract_document_structure(docx_path, dense_tables=False):
 
     doc = docx.Document(docx_path)
     document_data = {
@@ -101,28 +115,14 @@ def extract_document_structure(docx_path):
 
         elif isinstance(block, Table):
             table_counter += 1
-            table_data = []
-            total_rows = len(block.rows)
-            total_cells = 0
-
-            for row_idx, row in enumerate(block.rows):
-                row_data = []
-
-                for cell in row.cells:
-                    cell_text = cell.text.strip().replace("\n", " ")
-                    row_data.append(cell_text)
-                    total_cells += 1
-
-                table_data.append(row_data)
+            table_content = extract_table(block, table_counter)
+            if dense_tables:
+                table_content = expand_table(table_content)
+            total_rows = table_content["rows"]
+            total_cells = table_content["cells"]
 
             element_data["type"] = "table"
-            element_data["content"] = {
-                "table_id": table_counter,
-                "rows": total_rows,
-                "columns": len(block.columns) if total_rows > 0 else 0,
-                "cells": total_cells,
-                "data": table_data
-            }
+            element_data["content"] = table_content
 
             document_data["elements"].append(element_data)
             document_data["statistics"]["tables"] += 1
@@ -133,6 +133,76 @@ def extract_document_structure(docx_path):
 
     return document_data
 
+#Компактное представление таблицы: каждая физическая ячейка (w:tc) читается один раз.
+#Горизонтальное объединение (gridSpan) задаёт col_span, вертикальное (vMerge) - row_span;
+#продолжения вертикального объединения отдельными ячейками не сохраняются
+def extract_table(block, table_id):
+
+    tbl = block._tbl
+    table_cells = []
+    # Начатые вертикальные объединения: столбец сетки -> ячейка
+    open_merges = {}
+
+    for row_idx, tr in enumerate(tbl.tr_lst):
+        col_idx = getattr(tr, "grid_before", 0)
+
+        for tc in tr.tc_lst:
+            col_span = tc.grid_span
+            origin = open_merges.get(col_idx)
+
+            if tc.vMerge == "continue" and origin is not None:
+                origin["row_span"] += 1
+            else:
+                cell_data = {
+                    "row": row_idx,
+                    "col": col_idx,
+                    "row_span": 1,
+                    "col_span": col_span,
+                    "text": _Cell(tc, block).text.strip().replace("\n", " ")
+                }
+                table_cells.append(cell_data)
+                for col in range(col_idx, col_idx + col_span):
+                    open_merges.pop(col, None)
+                if tc.vMerge == "restart":
+                    open_merges[col_idx] = cell_data
+
+            col_idx += col_span
+
+    total_rows = len(tbl.tr_lst)
+    return {
+        "table_id": table_id,
+        "layout": "compact",
+        "rows": total_rows,
+        "columns": len(tbl.tblGrid.gridCol_lst) if total_rows > 0 else 0,
+        "cells": len(table_cells),
+        "data": table_cells
+    }
+
+
+#Полная сетка таблицы из компактного представления: текст объединённой ячейки
+#повторяется во всех позициях, которые она занимает
+def expand_table(table_content):
+
+    if table_content.get("layout") != "compact":
+        return table_content
+
+    columns = max([table_content["columns"]] + [cell["col"] + cell["col_span"] for cell in table_content["data"]])
+    grid = [[""] * columns for _ in range(table_content["rows"])]
+    for cell in table_content["data"]:
+        for row in range(cell["row"], cell["row"] + cell["row_span"]):
+            for col in range(cell["col"], cell["col"] + cell["col_span"]):
+                grid[row][col] = cell["text"]
+
+    return {
+        "table_id": table_content["table_id"],
+        "layout": "dense",
+        "rows": table_content["rows"],
+        "columns": table_content["columns"],
+        "cells": sum(len(row) for row in grid),
+        "data": grid
+    }
+
 #Пример использования
-target_directory = "Входная директория"
-parse_directory_docs(target_directory)
+if __name__ == "__main__":
+    target_directory = "Входная директория"
+    parse_directory_docs(target_directory)
@@ -2,6 +2,7 @@ import os
 import json
 import pandas as pd
 from pathlib import Path
+from batch_utils import file_digest, group_duplicates, output_path_for
 
 def parse_directory_excel(directory_path):
     dir_path = Path(directory_path)
@@ -22,18 +23,23 @@ def parse_directory_excel(directory_path):
 
     print(f"Найдено файлов: {len(excel_files)}")
 
-    for excel_path in excel_files:
-        process_excel_file(excel_path, output_dir)
+    # Одинаковые по содержимому файлы обрабатываются один раз
+    groups = group_duplicates(excel_files)
+    print(f"Уникальных файлов: {len(groups)}")
+
+    for content_hash, paths in groups:
+        process_excel_file(paths[0], output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash)
 
     print("\nОбработка всех файлов завершена!")
 
 
-def process_excel_file(excel_path, output_dir):
-    base_name = excel_path.stem
-    json_output = output_dir / f"{base_name}.json"
+def process_excel_file(excel_path, output_dir, root_dir=None, duplicates=(), content_hash=None):
+    json_output = output_path_for(excel_path, root_dir or excel_path.parent, output_dir)
 
     results = {
         "source_file": str(excel_path),
+        "duplicate_files": [str(path) for path in duplicates],
+        "content_hash": content_hash or file_digest(excel_path),
         "sheets": []
     }
 
@@ -57,14 +63,24 @@ def process_excel_file(excel_path, output_dir):
             "data": sheet_data
         })
 
+    results["statistics"] = {
+        "sheets": len(results["sheets"]),
+        "rows": sum(len(sheet["data"]) for sheet in results["sheets"]),
+        "cells": sum(len(row) for sheet in results["sheets"] for row in sheet["data"])
+    }
+
     # Сохранение результатов в JSON
     with open(json_output, "w", encoding="utf-8") as json_file:
         json.dump(results, json_file, ensure_ascii=False, indent=4)
 
     print(f"Файл обработан: {excel_path.name}")
     print(f"  Листов: {len(results['sheets'])}")
+    if duplicates:
+        print(f"  Дубликатов: {len(duplicates)}")
     print(f"  Результаты сохранены в: {json_output}")
 
+    return json_output, results["statistics"]
+
 
 if __name__ == "__main__":
     target_directory = "D:\\Тест"
@@ -1,10 +1,32 @@
 import os
 import json
 import pdfplumber
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from pathlib import Path
+from pdfplumber.utils import extract_text
+from batch_utils import file_digest, group_duplicates, output_path_for
+
+TEXT_SETTINGS = {
+    "x_tolerance": 1,
+    "y_tolerance": 1,
+    "layout": False,
+    "keep_blank_chars": False,
+}
+
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 4,
+    "join_tolerance": 4,
+    "edge_min_length": 10,
+    "text_tolerance": 4,
+    "text_x_tolerance": 4,
+    "text_y_tolerance": 4,
+}
 
 #Поиск файлов формата pdf в указанной директории
-def parse_directory(directory_path):
+def parse_directory(directory_path, exclude_table_text=False):
   
     dir_path = Path(directory_path)
 
@@ -24,19 +46,27 @@ def parse_directory(directory_path):
 
     print(f"Найдено файлов: {len(pdf_files)}")
 
-    for pdf_path in pdf_files:
-        process_pdF(pdf_path, output_dir)
+    # Одинаковые по содержимому файлы обрабатываются один раз
+    groups = group_duplicates(pdf_files)
+    print(f"Уникальных файлов: {len(groups)}")
+
+    for content_hash, paths in groups:
+        process_pdf(paths[0], output_dir, dir_path, duplicates=paths[1:], content_hash=content_hash,
+                    exclude_table_text=exclude_table_text)
 
     print("\nОбработка всех файлов завершена!")
 
 #Обработка одного файла
-def process_pdf(pdf_path, output_dir):
+#exclude_table_text - не включать в текст страницы символы, попавшие в найденные таблицы
+def process_pdf(pdf_path, output_dir, root_dir=None, duplicates=(), content_hash=None, exclude_table_text=False):
    
-    base_name = pdf_path.stem
-    json_output = output_dir / f"{base_name}.json"
+    json_output = output_path_for(pdf_path, root_dir or pdf_path.parent, output_dir)
 
     results = {
         "source_file": str(pdf_path),
+        "duplicate_files": [str(path) for path in duplicates],
+        "content_hash": content_hash or file_digest(pdf_path),
+        "text_excludes_tables": exclude_table_text,
         "pages": []
     }
 
@@ -44,69 +74,139 @@ def process_pdf(pdf_path, output_dir):
     with pdfplumber.open(pdf_path) as pdf:
         for page_num, page in enumerate(pdf.pages):
             page_data = {"page_number": page_num + 1}
-
-            # Извлечение текста
-            text = page.extract_text(
-                x_tolerance=1,
-                y_tolerance=1,
-                layout=False,
-                keep_blank_chars=False
-            )
-            page_data["text"] = text if text else ""
-
-            # Извлечение таблиц
-            page_data["tables"] = extract_tables(page)
-
+            page_data["text"], page_data["tables"] = analyze_page(page, exclude_table_text)
             results["pages"].append(page_data)
 
+    tables = [table for page in results["pages"] for table in page["tables"]]
+    results["statistics"] = {
+        "pages": len(results["pages"]),
+        "tables": len(tables),
+        "table_rows": sum(len(table["data"]) for table in tables),
+        "table_cells": sum(len(row) for table in tables for row in table["data"])
+    }
+
     # Сохранение результатов в JSON без обработки исключений
     with open(json_output, "w", encoding="utf-8") as json_file:
         json.dump(results, json_file, ensure_ascii=False, indent=4)
 
-    total_tables = sum(len(page['tables']) for page in results['pages'])
-    print(f"  Страниц: {len(results['pages'])}")
-    print(f"  Таблиц: {total_tables}")
+    print(f"  Страниц: {results['statistics']['pages']}")
+    print(f"  Таблиц: {results['statistics']['tables']}")
+    if duplicates:
+        print(f"  Дубликатов: {len(duplicates)}")
     print(f"  Результаты сохранены в: {json_output}")
 
+    return json_output, results["statistics"]
 
-def extract_tables(page):
-    
-    tables = []
-    table_settings = {
-        "vertical_strategy": "lines",
-        "horizontal_strategy": "lines",
-        "snap_tolerance": 4,
-        "join_tolerance": 4,
-        "edge_min_length": 10,
-        "text_tolerance": 4,
-        "text_x_tolerance": 4,
-        "text_y_tolerance": 4,
-    }
 
-    # Извлечение таблиц
-    raw_tables = page.find_tables(table_settings)
+#Анализ страницы: символы страницы обходятся один раз и распределяются по ячейкам
+#найденных таблиц через индекс сетки, а из того же прохода собирается текст страницы.
+#Так не нужен Table.extract(), который заново перебирает все символы страницы для каждой строки и ячейки
+def analyze_page(page, exclude_table_text=False):
+
+    # Сохраняются только таблицы размером не меньше 2x2
+    # Table.bbox и Table.rows пересчитываются при каждом обращении, поэтому индекс хранит их копии
+    indexes = []
+    for table_num, table in enumerate(page.find_tables(TABLE_SETTINGS)):
+        index = build_cell_index(table_num, table)
+        if len(index["rows"]) >= 2 and len(index["rows"][0].cells) >= 2:
+            indexes.append(index)
+
+    page_chars = []
+    for char in page.chars:
+        x = (char["x0"] + char["x1"]) / 2
+        y = (char["top"] + char["bottom"]) / 2
+        in_table = False
 
-    for table_num, table in enumerate(raw_tables):
-        table_data = table.extract()
+        for index in indexes:
+            x0, top, x1, bottom = index["bbox"]
+            if x0 <= x <= x1 and top <= y <= bottom:
+                in_table = True
+                add_char_to_cell(index, char, x, y)
 
-        if len(table_data) < 2 or len(table_data[0]) < 2:
-            continue
+        # Символы внутри сохранённых таблиц не дублируются в тексте страницы
+        if not (exclude_table_text and in_table):
+            page_chars.append(char)
+
+    # Извлечение текста
+    text = extract_text(page_chars, **TEXT_SETTINGS)
+
+    # Извлечение таблиц
+    tables = []
+    for index in indexes:
         #Определние координат таблицы в файле
-        bbox = table.bbox
+        bbox = index["bbox"]
         tables.append({
-            "table_number": table_num + 1,
+            "table_number": index["table_number"],
             "position": {
                 "x": round(bbox[0], 1),
                 "y": round(bbox[1], 1),
                 "width": round(bbox[2] - bbox[0], 1),
                 "height": round(bbox[3] - bbox[1], 1)
             },
-            "data": table_data
+            "data": table_cell_texts(index)
         })
 
-    return tables
+    return text if text else "", tables
+
+
+#Индекс ячеек таблицы: границы столбцов и строк сетки и ячейка, занимающая каждую клетку сетки
+def build_cell_index(table_num, table):
+
+    rows = table.rows
+    cells = [
+        (row_idx, col_idx, bbox)
+        for row_idx, row in enumerate(rows)
+        for col_idx, bbox in enumerate(row.cells)
+        if bbox is not None
+    ]
+    xs = sorted({bbox[0] for _, _, bbox in cells})
+    ys = sorted({bbox[1] for _, _, bbox in cells})
+
+    # Объединённая ячейка занимает несколько клеток сетки
+    slots = {}
+    for row_idx, col_idx, bbox in cells:
+        x0, top, x1, bottom = bbox
+        for i in range(bisect_left(ys, top), bisect_left(ys, bottom)):
+            for j in range(bisect_left(xs, x0), bisect_left(xs, x1)):
+                slots[(i, j)] = (row_idx, col_idx, bbox)
+
+    return {
+        "table_number": table_num + 1,
+        "bbox": table.bbox,
+        "rows": rows,
+        "xs": xs,
+        "ys": ys,
+        "slots": slots,
+        "chars": defaultdict(list)
+    }
+
+
+#Добавление символа в ячейку, в которую попадает его центр (те же правила, что в pdfplumber)
+def add_char_to_cell(index, char, x, y):
+
+    slot = index["slots"].get((bisect_right(index["ys"], y) - 1, bisect_right(index["xs"], x) - 1))
+    if slot is None:
+        return
+    row_idx, col_idx, (x0, top, x1, bottom) = slot
+    if x0 <= x < x1 and top <= y < bottom:
+        index["chars"][(row_idx, col_idx)].append(char)
+
+
+#Текст ячеек таблицы в виде списка строк, как у Table.extract(): None для отсутствующих ячеек
+def table_cell_texts(index):
 
+    cell_chars = index["chars"]
+    return [
+        [
+            None if bbox is None
+            else extract_text(cell_chars[(row_idx, col_idx)]) if (row_idx, col_idx) in cell_chars
+            else ""
+            for col_idx, bbox in enumerate(row.cells)
+        ]
+        for row_idx, row in enumerate(index["rows"])
+    ]
 
 
-target_directory = "D:\\Тесты"
-parse_directory(target_directory)
+if __name__ == "__main__":
+    target_directory = "D:\\Тесты"
+    parse_directory(target_directory)
@@ -0,0 +1,348 @@
+import os
+import time
+import queue
+import argparse
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from batch_utils import output_path_for
+
+# watchdog использует inotify на Linux; без него работает опрос директории
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+OUTPUT_ROOT = "parsed_results"
+OUTPUT_SUBDIRS = {
+    ".pdf": "Обработанные pdf",
+    ".docx": "Обработанные docx",
+    ".xlsx": "Обработанные excel",
+    ".xls": "Обработанные excel",
+}
+
+# Как часто в режиме watchdog директория полностью обходится, чтобы найти изменения,
+# пропущенные inotify (переполнение очереди событий, сетевые диски SMB/NFS), с
+RESCAN_INTERVAL = 30.0
+
+# Сколько раз файл повторно отправляется в обработку после аварийного завершения процесса-обработчика
+MAX_CRASH_RETRIES = 2
+
+# Парсеры импортируются один раз при запуске процесса-обработчика
+_parsers = {}
+# Очередь, через которую процесс-обработчик сообщает о начале обработки файла
+_started = None
+
+
+def _init_worker(started_queue=None):
+    global _started
+    _started = started_queue
+
+    import parse_pdf
+    import parse_docx
+    import parse_excel
+
+    _parsers[".pdf"] = parse_pdf.process_pdf
+    _parsers[".docx"] = parse_docx.process_docx_file
+    _parsers[".xlsx"] = parse_excel.process_excel_file
+    _parsers[".xls"] = parse_excel.process_excel_file
+
+
+#Обработка одного файла в процессе-обработчике
+def _process_file(file_path, root_dir):
+
+    # SimpleQueue пишет в канал сразу, поэтому сообщение не теряется при аварийном завершении процесса
+    if _started is not None:
+        _started.put(file_path)
+
+    suffix = file_path.suffix.lower()
+    output_dir = root_dir / OUTPUT_ROOT / OUTPUT_SUBDIRS[suffix]
+    return _parsers[suffix](file_path, output_dir, root_dir)
+
+
+#Подходит ли файл для обработки (временные файлы Word вида ~$name.docx пропускаются)
+def is_watched(file_path, root_dir):
+
+    file_path = Path(file_path)
+    if file_path.suffix.lower() not in OUTPUT_SUBDIRS or file_path.name.startswith("~$"):
+        return False
+    try:
+        return file_path.relative_to(root_dir).parts[0] != OUTPUT_ROOT
+    except ValueError:
+        return False
+
+
+#Размер и время изменения файла; None, если файл удалён
+def file_signature(file_path):
+
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+#Пустая задача для прогрева процесса-обработчика
+def _warm_up():
+    return os.getpid()
+
+
+#Пул процессов-обработчиков. ProcessPoolExecutor запускает процессы только при отправке задач,
+#поэтому в каждый процесс сразу отправляется пустая задача: парсеры импортируются до появления первого файла
+def _start_pool(max_workers, started_queue):
+
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(started_queue,))
+    for future in [executor.submit(_warm_up) for _ in range(max_workers)]:
+        future.result()
+    return executor
+
+
+#Рекурсивный обход директории без захода в папку с результатами.
+#Возвращает пары (путь, сигнатура); сигнатура берётся из os.DirEntry без повторного os.stat
+def scan_directory(root_dir):
+
+    stack = [root_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not (current == root_dir and entry.name == OUTPUT_ROOT):
+                    stack.append(Path(entry.path))
+            elif is_watched(entry.path, root_dir):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield Path(entry.path), (stat.st_size, stat.st_mtime_ns)
+
+
+#Есть ли для файла результат новее самого файла
+def is_up_to_date(file_path, root_dir):
+
+    output_dir = root_dir / OUTPUT_ROOT / OUTPUT_SUBDIRS[file_path.suffix.lower()]
+    json_output = output_path_for(file_path, root_dir, output_dir, create_dirs=False)
+    try:
+        return json_output.stat().st_mtime_ns >= file_path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+class _EventHandler(FileSystemEventHandler):
+
+    def __init__(self, events):
+        self.events = events
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.events.put(Path(event.src_path))
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.events.put(Path(event.src_path))
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.events.put(Path(event.src_path))
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.events.put(Path(event.src_path))
+            self.events.put(Path(event.dest_path))
+
+
+#Непрерывная обработка новых и изменённых файлов в директории.
+#Файл отправляется в обработку, когда его размер и время изменения не менялись settle_seconds секунд,
+#поэтому недописанные файлы не обрабатываются.
+#Одновременно в обработке не больше файлов, чем процессов-обработчиков; остальные ждут в pending.
+#Файлы, обработка которых уже началась к моменту аварийного завершения процесса-обработчика, повторяются
+#по одному, чтобы сбой можно было отнести к конкретному файлу; после max_retries повторов файл
+#считается необрабатываемым до следующего изменения. Не начатые задачи возвращаются в очередь без учёта сбоя.
+def watch_directory(directory_path, workers=None, settle_seconds=2.0, poll_interval=1.0, use_polling=False,
+                    max_retries=MAX_CRASH_RETRIES, rescan_interval=RESCAN_INTERVAL):
+
+    root_dir = Path(directory_path).resolve()
+
+    if not root_dir.is_dir():
+        print(f"Ошибка: Директория {directory_path} не существует!")
+        return
+
+    events = queue.Queue()
+    observer = None
+    if Observer is not None and not use_polling:
+        observer = Observer()
+        observer.schedule(_EventHandler(events), str(root_dir), recursive=True)
+        observer.start()
+        print(f"Отслеживание изменений в директории: {root_dir}")
+    else:
+        print(f"Опрос директории каждые {poll_interval} с: {root_dir}")
+
+    # pending: путь -> (сигнатура, время последнего изменения сигнатуры)
+    pending = {}
+    # known: путь -> сигнатура, для которой файл уже обработан или поставлен в очередь
+    known = {}
+    # in_flight: задача -> (путь, сигнатура)
+    in_flight = {}
+    # crashes: путь -> число аварийных завершений, во время которых файл обрабатывался
+    crashes = {}
+    # started: файлы, обработку которых процессы-обработчики уже начали
+    started = set()
+
+    # Файлы, появившиеся до запуска и ещё не обработанные
+    for file_path, signature in scan_directory(root_dir):
+        if is_up_to_date(file_path, root_dir):
+            known[file_path] = signature
+        else:
+            pending[file_path] = (signature, time.monotonic())
+
+    max_workers = workers or os.cpu_count() or 1
+    started_queue = multiprocessing.SimpleQueue()
+    try:
+        executor = _start_pool(max_workers, started_queue)
+    except Exception as e:
+        print(f"Ошибка: не удалось запустить процессы-обработчики: {str(e)}")
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        return
+    print(f"Запущено процессов-обработчиков: {max_workers}")
+
+    # В режиме watchdog директория дополнительно обходится раз в rescan_interval секунд
+    scan_interval = rescan_interval if observer is not None else poll_interval
+    last_scan = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+
+            # Новые события файловой системы или обход директории: путь -> сигнатура (None, если файл удалён)
+            changed = {}
+            if observer is not None:
+                paths = set()
+                try:
+                    while True:
+                        paths.add(events.get(timeout=poll_interval if not paths else 0))
+                except queue.Empty:
+                    pass
+                changed = {path: file_signature(path) for path in paths if is_watched(path, root_dir)}
+                now = time.monotonic()
+
+            if now - last_scan >= scan_interval:
+                scanned = dict(scan_directory(root_dir))
+                # Файлы, не найденные при обходе, удалены
+                scanned.update((path, None) for path in known.keys() - scanned.keys())
+                changed.update(scanned)
+                last_scan = now
+            elif observer is None:
+                time.sleep(min(poll_interval, settle_seconds) / 4)
+
+            now = time.monotonic()
+            in_flight_paths = {path for path, _ in in_flight.values()}
+            for file_path, signature in changed.items():
+                if signature is None:
+                    # Удалённый файл забывается: восстановленная копия будет обработана заново
+                    pending.pop(file_path, None)
+                    if file_path not in in_flight_paths:
+                        known.pop(file_path, None)
+                        crashes.pop(file_path, None)
+                    continue
+                if signature == known.get(file_path):
+                    continue
+                if file_path not in pending or pending[file_path][0] != signature:
+                    pending[file_path] = (signature, now)
+
+            # Файлы, которые перестали изменяться, отправляются в обработку
+            isolated = any(path in crashes for path in in_flight_paths)
+            suspects_waiting = any(path in crashes for path in pending)
+            for file_path, (signature, changed_at) in list(pending.items()):
+                if isolated or len(in_flight) >= max_workers:
+                    break
+                if file_path in in_flight_paths or (suspects_waiting and file_path not in crashes):
+                    continue
+                current = changed[file_path] if file_path in changed else file_signature(file_path)
+                if current is None:
+                    del pending[file_path]
+                elif current != signature:
+                    pending[file_path] = (current, now)
+                elif now - changed_at >= settle_seconds:
+                    # Подозрительный файл обрабатывается только в одиночку
+                    if file_path in crashes:
+                        if in_flight:
+                            continue
+                        isolated = True
+                    del pending[file_path]
+                    known[file_path] = signature
+                    try:
+                        future = executor.submit(_process_file, file_path, root_dir)
+                    except BrokenProcessPool:
+                        # Процесс-обработчик аварийно завершился (например, из-за нехватки памяти)
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = _start_pool(max_workers, started_queue)
+                        future = executor.submit(_process_file, file_path, root_dir)
+                    in_flight[future] = (file_path, signature)
+                    in_flight_paths.add(file_path)
+
+            # Сбор готовых результатов
+            while not started_queue.empty():
+                started.add(started_queue.get())
+            pool_broken = False
+            for future in [future for future in in_flight if future.done()]:
+                file_path, signature = in_flight.pop(future)
+                was_started = file_path in started
+                started.discard(file_path)
+                try:
+                    json_output, _ = future.result()
+                    crashes.pop(file_path, None)
+                    print(f"Файл обработан: {file_path.name} -> {json_output}")
+                except (BrokenProcessPool, CancelledError):
+                    # Задача потеряна вместе с процессом-обработчиком: файл возвращается в очередь.
+                    # Сбой учитывается только для файлов, обработка которых уже началась
+                    pool_broken = True
+                    if was_started:
+                        crashes[file_path] = crashes.get(file_path, 0) + 1
+                    if crashes.get(file_path, 0) > max_retries:
+                        del crashes[file_path]
+                        print(f"Ошибка при обработке {file_path.name}: процесс-обработчик аварийно "
+                              f"завершался {max_retries + 1} раз(а), файл пропущен до следующего изменения")
+                    else:
+                        del known[file_path]
+                        pending[file_path] = (signature, now - settle_seconds)
+                except Exception as e:
+                    crashes.pop(file_path, None)
+                    print(f"Ошибка при обработке {file_path.name}: {str(e)}")
+
+            # Пул с аварийно завершившимся процессом пересоздаётся сразу
+            if pool_broken:
+                print("Процесс-обработчик аварийно завершился, пул процессов перезапущен")
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = _start_pool(max_workers, started_queue)
+    except KeyboardInterrupt:
+        print("\nОстановка отслеживания...")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Непрерывная обработка файлов, появляющихся в директории")
+    parser.add_argument("directory", help="Отслеживаемая директория")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов-обработчиков")
+    parser.add_argument("--settle", type=float, default=2.0, help="Сколько секунд файл не должен изменяться перед обработкой")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Интервал опроса директории, с")
+    parser.add_argument("--polling", action="store_true", help="Опрашивать директорию вместо inotify")
+    parser.add_argument("--max-retries", type=int, default=MAX_CRASH_RETRIES,
+                        help="Число повторов файла после аварийного завершения процесса-обработчика")
+    parser.add_argument("--rescan-interval", type=float, default=RESCAN_INTERVAL,
+                        help="Интервал полного обхода директории в режиме inotify, с")
+    args = parser.parse_args()
+
+    watch_directory(args.directory, args.workers, args.settle, args.poll_interval, args.polling, args.max_retries,
+                    args.rescan_interval)